@@ -45,20 +45,19 @@ def generate_test_data():
     ]
     
     # 송신 총집계 파일 생성
-    with open(os.path.join(TEST_DATA_DIR, f"s.ksd653.log.{time_str}"), 'w') as f:
-        f.write('\n'.join(send_summary))
+    Path(TEST_DATA_DIR, f"s.ksd653.log.{time_str}").write_bytes('\n'.join(send_summary).encode('utf-8'))
     
     # 수신 총집계 파일 생성
-    with open(os.path.join(TEST_DATA_DIR, f"r.ksd653.log.{time_str}"), 'w') as f:
-        f.write('\n'.join(recv_summary))
+    Path(TEST_DATA_DIR, f"r.ksd653.log.{time_str}").write_bytes('\n'.join(recv_summary).encode('utf-8'))
     
     # 2. 거래 이력 로그 생성
     send_transactions = []
     recv_transactions = []
     
-    # 각각 20개의 거래 이력 생성
-    for i in range(20):
-        timestamp = current_time - timedelta(seconds=random.randint(0, 59))
+    # 각각 20개의 거래 이력 생성 (초 단위 오프셋을 정수로 먼저 정렬해 시간순으로 생성)
+    offsets = sorted((random.randint(0, 59) for _ in range(20)), reverse=True)
+    for i, offset in enumerate(offsets):
+        timestamp = current_time - timedelta(seconds=offset)
         timestamp_str = timestamp.strftime('%Y%m%d%H%M%S')
         
         # 송신 거래
@@ -70,12 +69,10 @@ def generate_test_data():
         recv_transactions.append(f"{timestamp_str}:aaaa코드bbbb_{i:04d}:{code}:RECV")
     
     # 송신 거래 이력 파일 생성
-    with open(os.path.join(TEST_DATA_DIR, f"s.tran.ksd653.log.{time_str}"), 'w') as f:
-        f.write('\n'.join(sorted(send_transactions)))
+    Path(TEST_DATA_DIR, f"s.tran.ksd653.log.{time_str}").write_bytes('\n'.join(send_transactions).encode('utf-8'))
     
     # 수신 거래 이력 파일 생성
-    with open(os.path.join(TEST_DATA_DIR, f"r.tran.ksd653.log.{time_str}"), 'w') as f:
-        f.write('\n'.join(sorted(recv_transactions)))
+    Path(TEST_DATA_DIR, f"r.tran.ksd653.log.{time_str}").write_bytes('\n'.join(recv_transactions).encode('utf-8'))
     
     print(f"\nGenerated test files for time: {time_str}")
     print("\nCreated files:")
@@ -1,10 +1,12 @@
 import streamlit as st
 import pandas as pd
+import numpy as np
 import plotly.express as px
 import logging
 from datetime import datetime, timedelta, time
 from pathlib import Path
 import os
+import re
 
 # 작업 디렉토리 설정
 BASE_DIR = r"D:\Daily\20241028"
@@ -26,18 +28,76 @@ logging.basicConfig(
 
 # KSD 코드별 업무명 정의
 KSD_BUSINESS_NAMES = {
-    '631': '주식 매수',
-    '632': '주식 매도',
-    '633': '잔고 조회',
-    '634': '계좌 조회',
-    '635': '시세 조회',
-    '636': '체결 확인',
-    '637': '예탁금 조회',
-    '638': '거래내역 조회',
-    '639': '계좌이체',
-    '640': '신용거래'
+    631: '주식 매수',
+    632: '주식 매도',
+    633: '잔고 조회',
+    634: '계좌 조회',
+    635: '시세 조회',
+    636: '체결 확인',
+    637: '예탁금 조회',
+    638: '거래내역 조회',
+    639: '계좌이체',
+    640: '신용거래'
 }
 
+# 거래 로그 파일명 패턴 (s|r.tran.ksd653.log.MMDDHHmm)
+TRAN_LOG_PATTERN = re.compile(r'(s|r)\.tran\.ksd653\.log\.\d{8}')
+
+# KSD 코드는 631부터 연속된 정수이므로 (코드 - 631)을 업무명 배열의 인덱스로 사용
+KSD_CODE_BASE = min(KSD_BUSINESS_NAMES)
+
+# 업무명 카테고리 (정의되지 않은 코드는 마지막 '미정의 업무'로 매핑)
+BUSINESS_NAME_DTYPE = pd.CategoricalDtype(list(KSD_BUSINESS_NAMES.values()) + ['미정의 업무'])
+
+def map_business_names(codes):
+    """KSD 코드 컬럼을 업무명 Categorical로 변환"""
+    idx = codes.to_numpy(dtype=np.int32) - KSD_CODE_BASE
+    idx = np.where((idx >= 0) & (idx < len(KSD_BUSINESS_NAMES)), idx, len(KSD_BUSINESS_NAMES))
+    return pd.Categorical.from_codes(idx, dtype=BUSINESS_NAME_DTYPE)
+
+def parse_timestamps(ts):
+    """YYYYMMDDHHMMSS 형식의 int64 배열을 datetime64 배열로 변환"""
+    months = (ts // 10**10 - 1970) * 12 + ts // 10**8 % 100 - 1
+    seconds = ((ts // 10**6 % 100 - 1) * 86400
+               + ts // 10**4 % 100 * 3600
+               + ts // 100 % 100 * 60
+               + ts % 100)
+    return (months.astype('datetime64[M]').astype('datetime64[s]')
+            + seconds.astype('timedelta64[s]')).astype('datetime64[ns]')
+
+# 로그 파싱 결과 캐시 (mtime을 키에 포함해 파일이 갱신되면 자동으로 다시 읽음)
+@st.cache_data(ttl=60, show_spinner=False)
+def _parse_summary(path, mtime):
+    """총집계 로그 파일 파싱"""
+    df = pd.read_csv(
+        path,
+        sep=':',
+        names=['ksd_code', 'count'],
+        dtype={'ksd_code': 'int16', 'count': 'int32'},
+        engine='c',
+        memory_map=True
+    )
+    if not df.empty:
+        df.insert(1, 'business_name', map_business_names(df['ksd_code']))
+        df['percentage'] = df['count'] / df['count'].sum() * 100
+    return df
+
+@st.cache_data(ttl=60, show_spinner=False)
+def _parse_transactions(path, mtime):
+    """거래 로그 파일 파싱"""
+    df = pd.read_csv(
+        path,
+        sep=':',
+        names=['timestamp', 'result_file', 'ksd_code', 'direction'],
+        dtype={'timestamp': 'int64', 'result_file': str, 'ksd_code': 'int16', 'direction': str},
+        engine='c',
+        memory_map=True
+    )
+    # 시각은 문자열 파싱 없이 정수 자릿수 연산으로 변환
+    df['timestamp'] = parse_timestamps(df['timestamp'].to_numpy())
+    df.insert(3, 'business_name', map_business_names(df['ksd_code']))
+    return df
+
 class KSDMonitor:
     def __init__(self):
         self.base_path = TEST_DATA_DIR
@@ -59,56 +119,60 @@ class KSDMonitor:
             if not os.path.exists(file_path):
                 logging.warning(f"Log file not found: {file_path}")
                 return pd.DataFrame(), None
-            
-            data = []
-            with open(file_path, 'r') as f:
-                for line in f:
-                    code, count = line.strip().split(':')
-                    data.append({
-                        'ksd_code': code,
-                        'business_name': KSD_BUSINESS_NAMES.get(code, '미정의 업무'),
-                        'count': int(count)
-                    })
-            
-            if data:
-                df = pd.DataFrame(data)
-                total = df['count'].sum()
-                df['percentage'] = (df['count'] / total * 100)
-                logging.info(f"Successfully read {len(data)} records from {file_path}")
-                return df, datetime.fromtimestamp(os.path.getmtime(file_path))
-                
+
+            # 빈 파일은 mmap 할 수 없으므로 데이터 없음으로 처리
+            if os.path.getsize(file_path) == 0:
+                return pd.DataFrame(), None
+
+            mtime = os.path.getmtime(file_path)
+            df = _parse_summary(file_path, mtime)
+
+            if not df.empty:
+                logging.info(f"Successfully read {len(df)} records from {file_path}")
+                return df, datetime.fromtimestamp(mtime)
+
             return pd.DataFrame(), None
 
         except Exception as e:
             logging.error(f"로그 파일 읽기 실패: {e}")
             return pd.DataFrame(), None
 
+    def iter_transaction_files(self, start_time, end_time, direction=None):
+        """조회 구간에 해당하는 거래 로그 파일의 (경로, mtime) 생성"""
+        prefixes = ['s'] if direction == 'SEND' else ['r'] if direction == 'RECV' else ['s', 'r']
+
+        # 분 단위로 파일 존재 여부를 확인하는 대신 디렉토리를 한 번만 읽음
+        with os.scandir(self.base_path) as entries:
+            tran_files = {
+                entry.name: entry for entry in entries
+                if TRAN_LOG_PATTERN.fullmatch(entry.name) and entry.is_file()
+            }
+
+        current = start_time
+
+        while current <= end_time:
+            for prefix in prefixes:
+                entry = tran_files.get(f"{prefix}.tran.ksd653.log.{current.strftime('%m%d%H%M')}")
+                if entry is None:
+                    continue
+                stat = entry.stat()
+                if stat.st_size > 0:
+                    logging.info(f"Reading transaction file: {entry.path}")
+                    yield entry.path, stat.st_mtime
+
+            current += timedelta(minutes=1)
+
     def read_transaction_log(self, start_time, end_time, direction=None):
         """거래 로그 파일 읽기"""
         try:
-            data = []
-            current = start_time
-            
-            while current <= end_time:
-                for prefix in (['s'] if direction == 'SEND' else ['r'] if direction == 'RECV' else ['s', 'r']):
-                    file_name = os.path.join(self.base_path, 
-                        f"{prefix}.tran.ksd653.log.{current.strftime('%m%d%H%M')}")
-                    logging.info(f"Checking transaction file: {file_name}")
-                    if os.path.exists(file_name):
-                        with open(file_name, 'r') as f:
-                            for line in f:
-                                timestamp, result_file, code, tran_type = line.strip().split(':')
-                                data.append({
-                                    'timestamp': datetime.strptime(timestamp, '%Y%m%d%H%M%S'),
-                                    'result_file': result_file,
-                                    'ksd_code': code,
-                                    'business_name': KSD_BUSINESS_NAMES.get(code, '미정의 업무'),
-                                    'direction': tran_type
-                                })
-                
-                current += timedelta(minutes=1)
-            
-            return pd.DataFrame(data)
+            files = list(self.iter_transaction_files(start_time, end_time, direction))
+
+            if not files:
+                return pd.DataFrame()
+
+            # 파일별 파싱 결과는 캐시되므로 순서대로 읽어 한 번에 합침
+            frames = [_parse_transactions(path, mtime) for path, mtime in files]
+            return pd.concat(frames, ignore_index=True, copy=False)
 
         except Exception as e:
             logging.error(f"거래 로그 읽기 실패: {e}")
@@ -177,20 +241,16 @@ def create_metrics_html(df, log_time, direction):
         <div class="metrics-container">
     """
     
-    # 총 발생건수를 첫 번째 항목으로 추가
-    total_count = df['count'].sum()
-    data_with_total = pd.concat([
-        pd.DataFrame([{
-            'ksd_code': 'TOTAL',
-            'business_name': '총 발생건수',
-            'count': total_count,
-            'percentage': 100.0
-        }]),
-        df.sort_values('count', ascending=False)
-    ]).reset_index(drop=True)
-    
-    for _, row in data_with_total.iterrows():
-        html += f"""
+    # 총 발생건수를 첫 번째 항목으로 추가 (나머지는 건수 내림차순)
+    records = [{
+        'ksd_code': 'TOTAL',
+        'business_name': '총 발생건수',
+        'count': df['count'].sum(),
+        'percentage': 100.0
+    }]
+    records += df.sort_values('count', ascending=False).to_dict('records')
+
+    html += ''.join(f"""
             <div class="metric-card">
                 <div class="metric-title">{row['business_name']}</div>
                 <div class="metric-value">{row['count']:,}건</div>
@@ -198,7 +258,7 @@ def create_metrics_html(df, log_time, direction):
                     <span>{row['ksd_code']} | {row['percentage']:.1f}%</span>
                 </div>
             </div>
-        """
+        """ for row in records)
     
     html += "</div>"
     
@@ -247,6 +307,52 @@ def main():
     except Exception as e:
         st.error(f"시스템 오류가 발생했습니다: {e}")
 
+# 도넛 차트 생성 함수 정의 (같은 데이터면 Figure 객체를 재사용, 로그가 매분 바뀌므로 파서와 같은 ttl로 만료)
+@st.cache_resource(ttl=60, max_entries=8, show_spinner=False)
+def build_distribution_chart(stats, title):
+    """업무별 분포 도넛 차트 생성"""
+    fig = px.pie(
+        stats,
+        values='count',
+        names='business_name',
+        title=f"{title} 업무별 분포",
+        hole=0.6
+    )
+
+    fig.update_traces(
+        textposition='inside',
+        textinfo='percent+label',
+        texttemplate='%{label}<br>%{percent:.1%}',
+        hovertemplate='<b>%{label}</b><br>건수: %{value:,.0f}<br>비율: %{percent:.1%}<extra></extra>',
+        marker=dict(
+            colors=px.colors.qualitative.Set3,
+            line=dict(color='#1E1E1E', width=2)
+        )
+    )
+
+    fig.update_layout(
+        showlegend=False,
+        plot_bgcolor='rgba(0,0,0,0)',
+        paper_bgcolor='rgba(0,0,0,0)',
+        margin=dict(t=40, l=0, r=0, b=0),
+        title={
+            'font': dict(size=20, color='#E1E1E1'),
+            'y': 0.99,
+            'x': 0.5,
+            'xanchor': 'center',
+            'yanchor': 'top'
+        },
+        annotations=[dict(
+            text=f'총 {stats["count"].sum():,}건',
+            x=0.5, y=0.5,
+            font=dict(size=20, color='#E1E1E1'),
+            showarrow=False
+        )],
+        font=dict(color='#E1E1E1')
+    )
+
+    return fig
+
 # 데이터 표시 함수 정의
 def display_data(stats, log_time, title):
     """HTML 대시보드와 도넛 ���트를 한 행에 표시하는 함수."""
@@ -261,52 +367,13 @@ def display_data(stats, log_time, title):
             )
 
         with col2:
-            fig = px.pie(
-                stats,
-                values='count',
-                names='business_name',
-                title=f"{title} 업무별 분포",
-                hole=0.6
-            )
-
-            fig.update_traces(
-                textposition='inside',
-                textinfo='percent+label',
-                texttemplate='%{label}<br>%{percent:.1%}',
-                hovertemplate='<b>%{label}</b><br>건수: %{value:,.0f}<br>비율: %{percent:.1%}<extra></extra>',
-                marker=dict(
-                    colors=px.colors.qualitative.Set3,
-                    line=dict(color='#1E1E1E', width=2)
-                )
-            )
-
-            fig.update_layout(
-                showlegend=False,
-                plot_bgcolor='rgba(0,0,0,0)',
-                paper_bgcolor='rgba(0,0,0,0)',
-                margin=dict(t=40, l=0, r=0, b=0),
-                title={
-                    'font': dict(size=20, color='#E1E1E1'),
-                    'y': 0.99,
-                    'x': 0.5,
-                    'xanchor': 'center',
-                    'yanchor': 'top'
-                },
-                annotations=[dict(
-                    text=f'총 {stats["count"].sum():,}건',
-                    x=0.5, y=0.5,
-                    font=dict(size=20, color='#E1E1E1'),
-                    showarrow=False
-                )],
-                font=dict(color='#E1E1E1')
-            )
-
-            st.plotly_chart(fig, use_container_width=True)
+            st.plotly_chart(build_distribution_chart(stats, title), use_container_width=True)
 
     else:
         st.info(f"{title} 데이터가 없습니다.")
 
-# 거래 이력 조회 표시 함수
+# 거래 이력 조회 표시 함수 (fragment로 분리해 조회 버튼 클릭 시 이 영역만 다시 실행)
+@st.fragment
 def display_transaction_history(monitor):
     """거래 이력 조회 기능을 구현"""
     with st.expander("검색 조건"):
@@ -344,17 +411,19 @@ def display_transaction_history(monitor):
                     if result_file:
                         tran_data = tran_data[tran_data["result_file"].str.contains(result_file, case=False, na=False)]
                     if ksd_code:
-                        tran_data = tran_data[tran_data["ksd_code"] == ksd_code]
+                        # KSD 코드는 정수로 저장되므로 정수 입력만 필터로 사용 (그 외 입력은 경고 후 필터 생략)
+                        if ksd_code.strip().isdecimal():
+                            tran_data = tran_data[tran_data["ksd_code"] == int(ksd_code)]
+                        else:
+                            st.warning(f"KSD 코드는 숫자로 입력해 주세요: '{ksd_code}' (코드 필터를 적용하지 않았습니다)")
                 
                 # timestamp 기준으로 내림차순 정렬
                 tran_data = tran_data.sort_values('timestamp', ascending=False)
 
-                st.dataframe(
-                    tran_data.style.format({
-                        "timestamp": lambda x: x.strftime("%Y-%m-%d %H:%M:%S")
-                    }),
-                    use_container_width=True
-                )
+                # 시간 표시 형식은 Styler 대신 벡터 연산으로 한 번에 변환
+                tran_data['timestamp'] = tran_data['timestamp'].dt.strftime("%Y-%m-%d %H:%M:%S")
+
+                st.dataframe(tran_data, use_container_width=True)
                 
                 # 조회된 데이터 건수 표시
                 st.info(f"조회된 데이터 건수: {len(tran_data):,}건")
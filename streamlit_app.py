@@ -4,10 +4,14 @@ import numpy as np
 import plotly.express as px
 import plotly.graph_objects as go
 from plotly.subplots import make_subplots
-import matplotlib.pyplot as plt
-from wordcloud import WordCloud
-import matplotlib.font_manager as fm
+import plotly.io as pio
 import os
+import io
+import uuid
+import pyarrow as pa
+
+# Plotly 그림 JSON 직렬화에 orjson 사용 (st.plotly_chart 직렬화 시간 단축)
+pio.json.config.default_engine = "orjson"
 
 # 페이지 설정
 st.set_page_config(
@@ -24,6 +28,9 @@ COLOR_SCALES = {
     'categorical': 'Set3'
 }
 
+# 상호작용이 필요 없는 차트용 설정 (정적 렌더링으로 브라우저 부담 감소)
+STATIC_CHART_CONFIG = {'staticPlot': True}
+
 # 스타일 설정
 st.markdown("""
     <style>
@@ -85,10 +92,54 @@ st.markdown("""
     </style>
     """, unsafe_allow_html=True)
 
+# 순위를 out 배열에 누적 (pandas rank(method='average')와 동일, NaN 값은 out을 NaN으로)
+def add_ranks(values, out, ascending=True):
+    values = np.asarray(values, dtype=np.float64)
+    valid = ~np.isnan(values)
+    v = values[valid] if ascending else -values[valid]
+
+    order = np.argsort(v, kind='mergesort')
+    sorted_v = v[order]
+
+    # 동점 구간마다 구간 내 순위의 평균을 부여
+    starts = np.r_[True, sorted_v[1:] != sorted_v[:-1]]
+    bounds = np.r_[np.flatnonzero(starts), sorted_v.size]
+    group_rank = (bounds[:-1] + bounds[1:] + 1) / 2
+
+    out[np.flatnonzero(valid)[order]] += group_rank[np.cumsum(starts) - 1]
+    out[~valid] = np.nan
+    return out
+
+# 가치투자 점수 (PBR 오름차순, ROE/시가총액 내림차순 순위의 평균)
+def value_score(pbr, roe, market_cap):
+    score = np.zeros(len(pbr))
+    add_ranks(pbr, score)
+    add_ranks(roe, score, ascending=False)
+    add_ranks(market_cap, score, ascending=False)
+    score /= 3
+    return score
+
+# 원본 데이터와 정제 결과 스냅샷 경로
+# (스냅샷은 정제된 데이터를 저장하므로 load_data의 정제 과정(이상치 처리, dtype 등)을 바꾸면
+#  SNAPSHOT_VERSION을 올려 이전 코드가 만든 스냅샷을 쓰지 않도록 함)
+SNAPSHOT_VERSION = 1
+DATA_CSV_PATH = "value_jipyo.csv"
+DATA_PARQUET_PATH = f"value_jipyo.v{SNAPSHOT_VERSION}.parquet"
+
+# 스냅샷 저장 (임시 파일에 쓴 뒤 교체해 중단되거나 동시에 쓰여도 깨진 파일이 남지 않도록)
+def save_snapshot(df, path):
+    # 같은 디렉터리에 세션별로 겹치지 않는 임시 파일 이름 사용 (os.replace는 같은 파일시스템에서 원자적)
+    tmp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+    try:
+        df.to_parquet(tmp_path, engine='pyarrow', compression='zstd')
+        os.replace(tmp_path, path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
 # 데이터 로드
 @st.cache_data
 def load_data():
-    df = pd.read_csv("value_jipyo.csv")
     numeric_columns = ['PBR', 'PER', 'ROE', '배당수익률', '시가총액(단위:백만원)', 
                        '종가', '등락률', '거래량', '거래대금', '배당성향']
     
@@ -99,23 +150,151 @@ def load_data():
         '배당수익률': ['`23 사업연도말 배당수익률', '`22 사업연도말 배당수익률', '`21 사업연도말 배당수익률'],
         '배당성향': ['`23 사업연도말 배당성향', '`22 사업연도말 배당성향', '`21 사업연도말 배당성향']
     }
-    
-    # 기본 숫자형 변환 및 이상치 처리
-    for col in numeric_columns:
-        if col in df.columns:  # 열이 존재하는 경우에만 처리
-            df[col] = pd.to_numeric(df[col], errors='coerce')
-            if col in ['PER', 'PBR', 'ROE']:
-                df[col] = df[col].clip(lower=df[col].quantile(0.01), 
-                                     upper=df[col].quantile(0.99))
-    
-    # 연도별 데이터 숫자형 변환
-    for metric, year_cols in year_columns.items():
-        for col in year_cols:
-            if col in df.columns:  # 열이 존재하는 경우에만 처리
-                df[col] = pd.to_numeric(df[col], errors='coerce')
-    
+    all_numeric_columns = numeric_columns + [col for cols in year_columns.values() for col in cols]
+
+    # 현재 버전의 정제된 스냅샷이 CSV보다 최신이면 CSV 파싱과 정제 과정을 건너뜀
+    snapshot_fresh = (
+        os.path.exists(DATA_PARQUET_PATH)
+        and os.path.getmtime(DATA_PARQUET_PATH) >= os.path.getmtime(DATA_CSV_PATH)
+    )
+
+    df = None
+    if snapshot_fresh:
+        try:
+            df = pd.read_parquet(DATA_PARQUET_PATH, engine='pyarrow')
+        except (OSError, pa.ArrowInvalid):
+            # 손상된 스냅샷은 무시하고 CSV에서 다시 만듦
+            df = None
+
+    if df is None:
+        # 숫자형 열은 C 파서에서 바로 float64로 변환 ('-' 등 결측 표기는 NaN 처리)
+        try:
+            df = pd.read_csv(
+                DATA_CSV_PATH,
+                dtype={col: 'float64' for col in all_numeric_columns},
+                na_values={col: ['', '-', 'N/A'] for col in all_numeric_columns}
+            )
+        except ValueError:
+            # 그 밖의 비숫자 값이 섞여 있으면 문자열로 읽은 뒤 변환할 수 없는 값을 NaN으로 처리
+            df = pd.read_csv(DATA_CSV_PATH)
+            present_columns = [col for col in all_numeric_columns if col in df.columns]
+            df[present_columns] = df[present_columns].apply(pd.to_numeric, errors='coerce').astype('float64')
+
+        # 이상치 처리 (세 열의 1%, 99% 분위수를 한 번에 계산해 clip)
+        clip_cols = [col for col in ['PER', 'PBR', 'ROE'] if col in df.columns]
+        values = df[clip_cols].to_numpy(dtype=np.float64)
+        lower, upper = np.nanquantile(values, [0.01, 0.99], axis=0)
+        df[clip_cols] = np.clip(values, lower, upper)
+
+        # 비율 지표는 float32로 저장 (시가총액·종가·거래량·거래대금은 합산 정밀도를 위해 float64 유지)
+        ratio_columns = [
+            col for col in ['PBR', 'PER', 'ROE', '배당수익률', '등락률', '배당성향']
+            + [col for cols in year_columns.values() for col in cols]
+            if col in df.columns
+        ]
+        df[ratio_columns] = df[ratio_columns].astype('float32')
+
+        # 섹터와 종목명은 Categorical로 저장 (groupby/비교 시 문자열 대신 정수 코드 사용)
+        df['섹터'] = df['섹터'].astype('category')
+        df['종목명'] = df['종목명'].astype('category')
+
+        # 다음 실행부터 사용할 스냅샷 저장 (읽기 전용 환경 등에서 실패하면 CSV 로드를 계속 사용)
+        try:
+            save_snapshot(df, DATA_PARQUET_PATH)
+        except (OSError, pa.ArrowException):
+            pass
+
+    # 가치투자 점수 계산 (순위를 미리 할당한 배열 하나에 누적)
+    df['가치투자점수'] = value_score(
+        df['PBR'].to_numpy(),
+        df['ROE'].to_numpy(),
+        df['시가총액(단위:백만원)'].to_numpy()
+    )
+
     return df, year_columns, numeric_columns
 
+# 섹터 집계 및 시장 지표 (rerun마다 groupby를 반복하지 않도록 한 번만 계산)
+# (df 전체를 매 rerun 해싱하지 않도록 _df는 캐시 키에서 제외하고 data_key로 구분,
+#  결과는 복사 없이 읽기 전용으로 공유)
+@st.cache_resource(show_spinner=False)
+def compute_aggregates(_df, year_columns, data_key):
+    # 섹터별 집계를 한 번의 groupby로 계산 (평균 대상 열은 한 번에 처리)
+    mean_columns = ['PBR', 'PER', 'ROE', '배당수익률', '배당성향', '등락률']
+    year_mean_columns = [col for cols in year_columns.values() for col in cols]
+    sector_group = _df[_df['섹터'].notna()].groupby('섹터', observed=True)
+    sector_means = sector_group[mean_columns + year_mean_columns].mean()
+    sector_means['시가총액(단위:백만원)'] = sector_group['시가총액(단위:백만원)'].sum()
+
+    # KPI는 열별 NumPy 배열에서 바로 계산 (pandas Series 오버헤드 제거, float32 열도 float64로 누적)
+    arrs = {
+        col: _df[col].to_numpy(dtype=np.float64)
+        for col in ['PBR', 'PER', 'ROE', '배당수익률', '등락률', '배당성향', '시가총액(단위:백만원)']
+    }
+
+    # 섹터 통계
+    sector_stats = sector_means[
+        ['시가총액(단위:백만원)', 'PBR', 'PER', 'ROE', '배당수익률']
+    ].reset_index()
+
+    # 섹터별 평균 배당률과 배당성향
+    sector_dividend = sector_means[['배당수익률', '배당성향']].reset_index()
+
+    # 업종별 투자 매력도
+    sector_metrics = sector_means[['PBR', '등락률', '시가총액(단위:백만원)']].sort_values('PBR', ascending=True)
+    # 투자매력도 = (1 + 등락률/100) / PBR (중간 Series 없이 배열 하나에서 제자리 연산)
+    attractiveness = sector_metrics['등락률'].to_numpy(dtype=np.float64) / 100
+    attractiveness += 1
+    attractiveness /= sector_metrics['PBR'].to_numpy(dtype=np.float64)
+    sector_metrics['투자매력도'] = attractiveness
+    sector_metrics = sector_metrics.sort_values('투자매력도', ascending=False)
+
+    # 종목명/섹터 조회용 인덱스 (종목 선택 시 전체 df를 마스크로 훑지 않도록 한 번만 구성)
+    # (종목명이 중복되면 기존 .iloc[0]과 같이 첫 행을 사용)
+    df_by_name = _df.drop_duplicates('종목명').set_index('종목명', drop=False)
+    by_sector = {sector: group for sector, group in sector_group}
+    sector_top_dividend = {sector: group.nlargest(10, '배당수익률') for sector, group in by_sector.items()}
+
+    return {
+        'df_by_name': df_by_name,
+        'by_sector': by_sector,
+        'sector_top_dividend': sector_top_dividend,
+        'sector_stats': sector_stats,
+        'sector_dividend': sector_dividend,
+        'sector_metrics': sector_metrics,
+        'sector_yearly_by_metric': {
+            metric: sector_means[cols] for metric, cols in year_columns.items()
+        },
+        # 화면별 상위 종목 (rerun마다 부분 정렬을 반복하지 않도록 미리 추출)
+        # (트리맵은 path 열을 observed 없이 groupby하므로 종목명을 일반 문자열 열로 전달)
+        'top_roe': _df[['종목명', 'ROE', '배당수익률', 'PBR', '시가총액(단위:백만원)']].nlargest(50, 'ROE').astype({'종목명': object}),
+        'top_dividend': _df[['종목명', '배당수익률', '섹터']].nlargest(10, '배당수익률'),
+        'top_value': _df[
+            ['가치투자점수', '종목명', 'PBR', 'ROE', '시가총액(단위:백만원)', '섹터', '배당수익률', '배당성향']
+        ].nlargest(100, '가치투자점수'),
+        # 지표별 개선도(최근 연도 - 전년도) 상위 10개 종목 (지표 선택마다 df에 열을 추가하지 않도록 미리 계산)
+        'top_improved_by_metric': {
+            metric: _df[['종목명', '섹터']]
+            .assign(**{f'{metric}_개선도': _df[cols[0]] - _df[cols[1]]})
+            .nlargest(10, f'{metric}_개선도')
+            for metric, cols in year_columns.items()
+        },
+        'yearly_avg_by_metric': {
+            metric: dict(zip(['2023', '2022', '2021'], np.nanmean(_df[cols].to_numpy(dtype=np.float64), axis=0)))
+            for metric, cols in year_columns.items()
+        },
+        'total_market_cap': np.nansum(arrs['시가총액(단위:백만원)']) / 1000000,
+        'avg_pbr': np.nanmean(arrs['PBR']),
+        'avg_per': np.nanmean(arrs['PER']),
+        'avg_roe': np.nanmean(arrs['ROE']),
+        'avg_dividend_yield': np.nanmean(arrs['배당수익률']),
+        'median_dividend_yield': np.nanmedian(arrs['배당수익률']),
+        'avg_payout_ratio': np.nanmean(arrs['배당성향']),
+        'market_momentum': np.nanmean(arrs['등락률']),
+        'high_roe_companies': np.count_nonzero(arrs['ROE'] >= 15),
+        'low_pbr_companies': np.count_nonzero(arrs['PBR'] < 1),
+        'dividend_companies': np.count_nonzero(arrs['배당수익률'] > 0)
+    }
+
 # 차트 기본 레이아웃 설정
 def get_chart_layout(title=""):
     return {
@@ -133,6 +312,156 @@ def get_chart_layout(title=""):
         )
     }
 
+# 차트 생성 함수 (같은 입력이면 Figure 객체를 재사용해 rerun 시 재생성 방지)
+@st.cache_resource(show_spinner=False)
+def build_sector_pbr_roe_chart(sector_stats):
+    fig = go.Figure()
+    fig.add_trace(go.Bar(
+        x=sector_stats['섹터'],
+        y=sector_stats['PBR'],
+        name='PBR',
+        marker_color=COLOR_SCALES['main'][0]
+    ))
+    fig.add_trace(go.Bar(
+        x=sector_stats['섹터'],
+        y=sector_stats['ROE'],
+        name='ROE',
+        marker_color=COLOR_SCALES['main'][1]
+    ))
+    fig.update_layout(
+        **get_chart_layout("섹터별 평균 PBR과 ROE"),
+        barmode='group'
+    )
+    return fig
+
+@st.cache_resource(show_spinner=False)
+def build_sector_scatter_chart(sector_stats):
+    fig = px.scatter(
+        sector_stats,
+        x='PBR',
+        y='ROE',
+        size='시가총액(단위:백만원)',
+        color='섹터',
+        title='섹터별 PBR vs ROE 비교',
+        labels={'PBR': 'PBR', 'ROE': 'ROE (%)'},
+        render_mode='webgl'
+    )
+    fig.update_layout(get_chart_layout())
+    return fig
+
+@st.cache_resource(show_spinner=False)
+def build_sector_dividend_chart(sector_stats):
+    fig = px.bar(
+        sector_stats.sort_values('배당수익률', ascending=False),
+        x='섹터',
+        y='배당수익률',
+        title='섹터별 평균 배당수익률',
+        color='배당수익률',
+        color_continuous_scale=COLOR_SCALES['sequential']
+    )
+    fig.update_layout(get_chart_layout())
+    return fig
+
+@st.cache_resource(show_spinner=False)
+def build_sector_attractiveness_chart(sector_metrics):
+    fig = px.bar(
+        sector_metrics,
+        y=sector_metrics.index,
+        x='투자매력도',
+        title="업종별 투자 매력도 (PBR의 역수 * (1 + 등락률))",
+        color='시가총액(단위:백만원)',
+        color_continuous_scale=COLOR_SCALES['sequential']
+    )
+    fig.update_layout(get_chart_layout())
+    return fig
+
+@st.cache_resource(show_spinner=False)
+def build_market_trend_chart(yearly_avg, metric_choice):
+    fig = go.Figure()
+    fig.add_trace(go.Scatter(
+        x=list(yearly_avg.keys()),
+        y=list(yearly_avg.values()),
+        mode='lines+markers',
+        name=f'평균 {metric_choice}'
+    ))
+    fig.update_layout(**get_chart_layout(f"시장 평균 {metric_choice} 추이"))
+    return fig
+
+@st.cache_resource(show_spinner=False)
+def build_sector_yearly_chart(sector_yearly, year_cols, metric_choice):
+    fig = go.Figure()
+    for year, col in zip(['2023', '2022', '2021'], year_cols):
+        fig.add_trace(go.Bar(
+            name=year,
+            x=sector_yearly.index,
+            y=sector_yearly[col]
+        ))
+    fig.update_layout(
+        **get_chart_layout(f"섹터별 연도별 {metric_choice} 추이"),
+        barmode='group'
+    )
+    return fig
+
+@st.cache_resource(show_spinner=False)
+def build_top_improved_chart(top_improved, metric_choice):
+    fig = px.bar(
+        top_improved,
+        x='종목명',
+        y=f'{metric_choice}_개선도',
+        color='섹터',
+        title=f"Top 10 {metric_choice} 개선 기업"
+    )
+    fig.update_layout(get_chart_layout())
+    return fig
+
+@st.cache_resource(show_spinner=False)
+def build_sector_dividend_heatmap(sector_dividend):
+    fig = px.imshow(sector_dividend[['배당수익률', '배당성향']],
+                    labels=dict(x="지표", y="섹터", color="값"),
+                    x=['배당수익률', '배당성향'],
+                    y=sector_dividend['섹터'],
+                    color_continuous_scale="YlOrRd",
+                    aspect="auto")
+
+    # 셀에 값 표시
+    fig.update_traces(text=sector_dividend[['배당수익률', '배당성향']].values.round(2), texttemplate="%{text}")
+    fig.update_layout(
+        title="섹터별 평균 배당률과 배당성향",
+        xaxis_title="",
+        yaxis_title="",
+        height=600,
+        width=800,
+    )
+    return fig
+
+# 투자 기회 표 열 서식 (Styler 대신 column_config로 표시 형식만 지정해 정렬은 숫자 기준 유지)
+VALUE_TABLE_COLUMN_CONFIG = {
+    'PBR': st.column_config.NumberColumn(format='%.2f'),
+    'ROE': st.column_config.NumberColumn(format='%.2f%%'),
+    '시가총액(단위:백만원)': st.column_config.NumberColumn(step=1),  # 서식 미지정 시 천 단위 구분 기호 표시
+    '가치투자점수': st.column_config.NumberColumn(format='%.0f'),
+    '배당수익률': st.column_config.NumberColumn(format='%.2f%%'),
+    '배당성향': st.column_config.NumberColumn(format='%.2f%%'),
+}
+
+# 워드클라우드 렌더링 (배치 계산이 무거우므로 PNG 바이트로 캐시)
+@st.cache_data(show_spinner=False)
+def render_wordcloud_png(freqs_tuple, font_path):
+    # wordcloud(및 matplotlib)는 배당 분석 화면에서만 쓰이므로 처음 렌더링할 때 import
+    from wordcloud import WordCloud
+
+    wordcloud = WordCloud(
+        font_path=font_path,
+        width=800,
+        height=400,
+        background_color='white',
+        colormap='viridis'
+    ).generate_from_frequencies(dict(freqs_tuple))
+
+    buf = io.BytesIO()
+    wordcloud.to_image().save(buf, format='PNG')
+    return buf.getvalue()
+
 # 메인 타이틀
 st.title('코리안벨류업 종목 분석 대시보드')
 
@@ -141,53 +470,39 @@ st.title('코리안벨류업 종목 분석 대시보드')
 # 데이터 로드 및 기본 계산
 with st.spinner('데이터를 분석중입니다...'):
     df, year_columns, numeric_columns = load_data()
-    
-    # 기본 지표 계산
-    total_market_cap = df['시가총액(단위:백만원)'].sum() / 1000000
-    avg_pbr = df['PBR'].mean()
-    avg_per = df['PER'].mean()
-    avg_roe = df['ROE'].mean()
-    avg_dividend_yield = df['배당수익률'].mean()
-    market_momentum = df['등락률'].mean()
-    high_roe_companies = df[df['ROE'] >= 15].shape[0]
-    low_pbr_companies = df[df['PBR'] < 1].shape[0]
-    
-    # 섹터 통계
-    sector_stats = df[df['섹터'].notna()].groupby('섹터').agg({
-        '시가총액(단위:백만원)': 'sum',
-        'PBR': 'mean',
-        'PER': 'mean',
-        'ROE': 'mean',
-        '배당수익률': 'mean'
-    }).reset_index()
-
-# 탭 생성
-tabs = st.tabs([
-    "📊 시장 개요",
-    "🏢 섹터 분석",
-    "🔍 개별 종목 분석",
-    "💰 배당 분석",
-    "📅 연도별 추이",
-    "💡 투자 기회"
-])
-
-with tabs[0]:  # 시장 개요
+    # 집계 캐시 키는 스냅샷 버전과 원본 CSV 수정 시각 (df 자체는 해싱하지 않음)
+    data_key = (SNAPSHOT_VERSION, os.path.getmtime(DATA_CSV_PATH))
+    agg = compute_aggregates(df, year_columns, data_key)
+
+    # 기본 지표
+    total_market_cap = agg['total_market_cap']
+    avg_pbr = agg['avg_pbr']
+    avg_per = agg['avg_per']
+    avg_roe = agg['avg_roe']
+    avg_dividend_yield = agg['avg_dividend_yield']
+    market_momentum = agg['market_momentum']
+    high_roe_companies = agg['high_roe_companies']
+    low_pbr_companies = agg['low_pbr_companies']
+
+# 시장 개요
+@st.fragment
+def render_market_overview(df, agg, year_columns):
     col1, col2, col3, col4 = st.columns(4)
     
     with col1:
-        st.metric("총 시가총액 (조원)", f"{total_market_cap:,.2f}")
+        st.metric("총 시가총액 (조원)", f"{agg['total_market_cap']:,.2f}")
     with col2:
-        st.metric("평균 PBR", f"{avg_pbr:.2f}")
+        st.metric("평균 PBR", f"{agg['avg_pbr']:.2f}")
     with col3:
-        st.metric("평균 ROE (%)", f"{avg_roe:.2f}")
+        st.metric("평균 ROE (%)", f"{agg['avg_roe']:.2f}")
     with col4:
-        st.metric("시장 모멘텀 (%)", f"{market_momentum:.2f}")
+        st.metric("시장 모멘텀 (%)", f"{agg['market_momentum']:.2f}")
     
     col1, col2 = st.columns(2)
     
     with col1:
         fig = px.pie(
-            sector_stats.nlargest(5, '시가총액(단위:백만원)'),
+            agg['sector_stats'].nlargest(5, '시가총액(단위:백만원)'),
             values='시가총액(단위:백만원)',
             names='섹터',
             title='상위 5개 섹터별 시가총액 비중',
@@ -219,16 +534,17 @@ with tabs[0]:  # 시장 개요
             textinfo='percent+label'
         )
     
-        st.plotly_chart(fig, use_container_width=True)
+        st.plotly_chart(fig, use_container_width=True, config=STATIC_CHART_CONFIG)
         st.markdown("이 차트는 시가총액 기준 상위 5개 섹터의 비중을 보여줍니다. 각 섹터가 전체 시장에서 차지하는 비율을 한눈에 파악할 수 있습니다.")
     with col2:
         # 시가총액을 10억원 단위로 변환 (기존 단위: 백만원)
-        df['시가총액_10억'] = df['시가총액(단위:백만원)'] / 1000
-        df['시가총액_log'] = np.log10(df['시가총액_10억'])
+        # (캐시된 df를 수정하지 않도록 차트에 필요한 열만 별도 프레임으로 구성)
+        market_cap = pd.DataFrame({'시가총액_10억': df['시가총액(단위:백만원)'] / 1000})
+        market_cap['시가총액_log'] = np.log10(market_cap['시가총액_10억'])
         
         # 히스토그램 생성
         fig = px.histogram(
-            df,
+            market_cap,
             x='시가총액_log',
             nbins=30,
             title='기업 시가총액 분포 (로그 스케일)',
@@ -236,7 +552,7 @@ with tabs[0]:  # 시장 개요
         )
         
         # x축 눈금 설정 (로그 스케일을 실제 값으로 변환)
-        tick_vals = list(range(int(df['시가총액_log'].min()), int(df['시가총액_log'].max()) + 1))
+        tick_vals = list(range(int(market_cap['시가총액_log'].min()), int(market_cap['시가총액_log'].max()) + 1))
         tick_text = [f'{10**x:,.0f}억원' for x in tick_vals]
         
         fig.update_layout(
@@ -277,11 +593,11 @@ with tabs[0]:  # 시장 개요
             opacity=0.8
         )
         
-        st.plotly_chart(fig, use_container_width=True)
+        st.plotly_chart(fig, use_container_width=True, config=STATIC_CHART_CONFIG)
         
         # 분포 설명 추가
-        med_cap = df['시가총액_10억'].median()
-        max_cap = df['시가총액_10억'].max()
+        med_cap = market_cap['시가총액_10억'].median()
+        max_cap = market_cap['시가총액_10억'].max()
         
         st.markdown(f"""
         ### 시가총액 분포 특징
@@ -293,7 +609,7 @@ with tabs[0]:  # 시장 개요
     st.subheader("ROE 상위 50 기업 트리맵")
     
     # ROE 상위 50개 기업 선택
-    top_roe_companies = df.nlargest(50, 'ROE').copy()
+    top_roe_companies = agg['top_roe']
     
     # 배당수익률에 따른 색상 범위 설정
     min_dividend = top_roe_companies['배당수익률'].min()
@@ -358,28 +674,8 @@ with tabs[0]:  # 시장 개요
 
     st.subheader("섹터별 배당률과 배당성향 히트맵")
 
-    # 섹터별 평균 배당률과 배당성향 계산
-    sector_dividend = df.groupby('섹터')[['배당수익률', '배당성향']].mean().reset_index()
-
-    # 히트맵 생성
-    fig = px.imshow(sector_dividend[['배당수익률', '배당성향']],
-                    labels=dict(x="지표", y="섹터", color="값"),
-                    x=['배당수익률', '배당성향'],
-                    y=sector_dividend['섹터'],
-                    color_continuous_scale="YlOrRd",
-                    aspect="auto")
-
-    # 셀에 값 표시
-    fig.update_traces(text=sector_dividend[['배당수익률', '배당성향']].values.round(2), texttemplate="%{text}")
-    fig.update_layout(
-        title="섹터별 평균 배당률과 배당성향",
-        xaxis_title="",
-        yaxis_title="",
-        height=600,
-        width=800,
-    )
-
-    st.plotly_chart(fig, use_container_width=True)
+    # 섹터별 평균 배당률과 배당성향 히트맵 (두 화면이 같은 Figure를 공유)
+    st.plotly_chart(build_sector_dividend_heatmap(agg['sector_dividend']), use_container_width=True)
 
     st.markdown("""
     이 히트맵은 각 섹터의 평균 배당률과 배당성향을 보여줍니다:
@@ -389,82 +685,32 @@ with tabs[0]:  # 시장 개요
     색상이 진할수록 해당 값이 높음을 나타냅니다. 이를 통해 어떤 섹터가 배당 투자에 적합한지 파악할 수 있습니다.
     """)
 
-with tabs[1]:  # 섹터 분석
+# 섹터 분석
+@st.fragment
+def render_sector_analysis(df, agg, year_columns):
     st.subheader("섹터별 분석")
     
     # 섹터별 주요 지표
-    fig = go.Figure()
-    fig.add_trace(go.Bar(
-        x=sector_stats['섹터'],
-        y=sector_stats['PBR'],
-        name='PBR',
-        marker_color=COLOR_SCALES['main'][0]
-    ))
-    fig.add_trace(go.Bar(
-        x=sector_stats['섹터'],
-        y=sector_stats['ROE'],
-        name='ROE',
-        marker_color=COLOR_SCALES['main'][1]
-    ))
-    fig.update_layout(
-        **get_chart_layout("섹터별 평균 PBR과 ROE"),
-        barmode='group'
-    )
-    st.plotly_chart(fig, use_container_width=True)
+    st.plotly_chart(build_sector_pbr_roe_chart(agg['sector_stats']), use_container_width=True)
     st.markdown("이 그래프는 각 섹터의 평균 PBR과 ROE를 비교하여 보여줍니다. 이를 통해 어떤 섹터가 상대적으로 저평가되어 있는지, 또는 수익성이 높은지 파악할 수 있습니다.")
     
     # 섹터별 평균 지표 비교
     col1, col2 = st.columns(2)
     
     with col1:
-        fig = px.scatter(
-            sector_stats,
-            x='PBR',
-            y='ROE',
-            size='시가총액(단위:백만원)',
-            color='섹터',
-            title='섹터별 PBR vs ROE 비교',
-            labels={'PBR': 'PBR', 'ROE': 'ROE (%)'}
-        )
-        fig.update_layout(get_chart_layout())
-        st.plotly_chart(fig, use_container_width=True)
+        st.plotly_chart(build_sector_scatter_chart(agg['sector_stats']), use_container_width=True)
         st.markdown("이 산점도는 각 섹터의 평균 PBR과 ROE를 비교하며, 버블의 크기는 해당 섹터의 총 시가총액을 나타냅니다. 이를 통해 각 섹터의 가치와 수익성, 그고 시장 규모를 한 번에 비교할 수 있습니다.")
     
     with col2:
-        fig = px.bar(
-            sector_stats.sort_values('배당수익률', ascending=False),
-            x='섹터',
-            y='배당수익률',
-            title='섹터별 평균 배당수익률',
-            color='배당수익률',
-            color_continuous_scale=COLOR_SCALES['sequential']
-        )
-        fig.update_layout(get_chart_layout())
-        st.plotly_chart(fig, use_container_width=True)
+        st.plotly_chart(build_sector_dividend_chart(agg['sector_stats']), use_container_width=True)
         st.markdown("이 막대 그래프는 각 섹터의 평균 배당수익률을 보여줍니다. 색상의 진한 정도로 배당수익률의 높낮이를 직관적으로 파악할 수 있으며, 어떤 섹터가 상대적으로 높은 배당을 제공하는지 알 수 있습니다.")
 
     # 업종별 투자 매력도
-    sector_metrics = df[df['섹터'].notna()].groupby('섹터').agg({
-        'PBR': 'mean',
-        '등락률': 'mean',
-        '시가총액(단위:백만원)': 'sum'
-    }).sort_values('PBR', ascending=True)
-    
-    sector_metrics['투자매력도'] = (1 / sector_metrics['PBR']) * (1 + sector_metrics['등락률'] / 100)
-    sector_metrics = sector_metrics.sort_values('투자매력도', ascending=False)
-
-    fig = px.bar(
-        sector_metrics,
-        y=sector_metrics.index,
-        x='투자매력도',
-        title="업종별 투자 매력도 (PBR의 역수 * (1 + 등락률))",
-        color='시가총액(단위:백만원)',
-        color_continuous_scale=COLOR_SCALES['sequential']
-    )
-    fig.update_layout(get_chart_layout())
-    st.plotly_chart(fig, use_container_width=True)
+    st.plotly_chart(build_sector_attractiveness_chart(agg['sector_metrics']), use_container_width=True)
 
-with tabs[2]:  # 개별 종목 분석
+# 개별 종목 분석
+@st.fragment
+def render_stock_analysis(df, agg, year_columns):
     st.subheader("개별 종목 분석")
     
     # 종목 선택
@@ -474,7 +720,7 @@ with tabs[2]:  # 개별 종목 분석
     )
     
     # 선택된 종목 정보
-    stock_data = df[df['종목명'] == selected_stock].iloc[0]
+    stock_data = agg['df_by_name'].loc[selected_stock]
     
     # 종목 기본 정보 표시
     col1, col2, col3, col4 = st.columns(4)
@@ -505,7 +751,7 @@ with tabs[2]:  # 개별 종목 분석
     
     with col1:
         # PBR 추이
-        pbr_data = [stock_data[col] for col in year_columns['PBR']]
+        pbr_data = stock_data.reindex(year_columns['PBR']).to_numpy(dtype=float)
         fig = go.Figure()
         fig.add_trace(go.Scatter(
             x=years,
@@ -518,7 +764,7 @@ with tabs[2]:  # 개별 종목 분석
     
     with col2:
         # ROE 추이
-        roe_data = [stock_data[col] for col in year_columns['ROE']]
+        roe_data = stock_data.reindex(year_columns['ROE']).to_numpy(dtype=float)
         fig = go.Figure()
         fig.add_trace(go.Scatter(
             x=years,
@@ -533,13 +779,7 @@ with tabs[2]:  # 개별 종목 분석
     
     with col1:
         # PER 추이
-        per_data = []
-        for col in year_columns['PER']:
-            try:
-                per_data.append(stock_data[col])
-            except KeyError:
-                per_data.append(None)  # 데이터가 없는 경우 None 추가
-        
+        per_data = stock_data.reindex(year_columns['PER']).to_numpy(dtype=float)  # 데이터가 없는 열은 NaN
         fig = go.Figure()
         fig.add_trace(go.Scatter(
             x=years,
@@ -552,7 +792,7 @@ with tabs[2]:  # 개별 종목 분석
     
     with col2:
         # 배당수익률 추이
-        dividend_data = [stock_data[col] for col in year_columns['배당수익률']]
+        dividend_data = stock_data.reindex(year_columns['배당수익률']).to_numpy(dtype=float)
         fig = go.Figure()
         fig.add_trace(go.Scatter(
             x=years,
@@ -565,7 +805,10 @@ with tabs[2]:  # 개별 종목 분석
     
     # 동종 업계 비교
     st.subheader("동종 업계 비교")
-    same_sector = df[df['섹터'] == stock_data['섹터']]
+    # 섹터가 없는 종목은 groupby에서 빠지므로 빈 프레임으로 처리
+    same_sector = agg['by_sector'].get(stock_data['섹터'], df.iloc[:0])[
+        ['종목명', 'PBR', 'PER', 'ROE', '시가총액(단위:백만원)', '배당수익률', '배당성향']
+    ]
     
     col1, col2 = st.columns(2)
     
@@ -577,7 +820,8 @@ with tabs[2]:  # 개별 종목 분석
             size='시가총액(단위:백만원)',
             hover_name='종목명',
             title='동종 업계 PBR vs ROE',
-            color='PER'
+            color='PER',
+            render_mode='webgl'
         )
         # 선택된 종목 강조
         fig.add_trace(go.Scatter(
@@ -593,7 +837,7 @@ with tabs[2]:  # 개별 종목 분석
     with col2:
         # 배당수익률 비교
         fig = px.bar(
-            same_sector.nlargest(10, '배당수익률'),
+            agg['sector_top_dividend'].get(stock_data['섹터'], df.iloc[:0]),
             x='종목명',
             y='배당수익률',
             title='동종 업계 top 10 배당수익률',
@@ -622,45 +866,27 @@ with tabs[2]:  # 개별 종목 분석
     배당수익률은 {'증가' if dividend_data[0] > dividend_data[-1] else '감소'}하고 있습니다.
     """)
 
-with tabs[3]:  # 배당 분석
+# 배당 분석
+@st.fragment
+def render_dividend_analysis(df, agg, year_columns):
     st.subheader("배당 분석")
     
     # 전체 배당 현황
     col1, col2, col3, col4 = st.columns(4)
     with col1:
-        st.metric("평균 배당수익률", f"{df['배당수익률'].mean():.2f}%")
+        st.metric("평균 배당수익률", f"{agg['avg_dividend_yield']:.2f}%")
     with col2:
-        st.metric("중앙값 배당수익률", f"{df['배당수익률'].median():.2f}%")
+        st.metric("중앙값 배당수익률", f"{agg['median_dividend_yield']:.2f}%")
     with col3:
-        st.metric("배당 지급 기업 수", f"{df[df['배당수익률'] > 0].shape[0]}")
+        st.metric("배당 지급 기업 수", f"{agg['dividend_companies']}")
     with col4:
-        st.metric("평균 배당성향", f"{df['배당성향'].mean():.2f}%")
+        st.metric("평균 배당성향", f"{agg['avg_payout_ratio']:.2f}%")
     
     # 섹터별 배당률과 배당성향 히트맵 추가
     st.subheader("섹터별 배당률과 배당성향 히트맵")
 
-    # 섹터별 평균 배당률과 배당성향 계산
-    sector_dividend = df.groupby('섹터')[['배당수익률', '배당성향']].mean().reset_index()
-
-    # 히트맵 생성
-    fig = px.imshow(sector_dividend[['배당수익률', '배당성향']],
-                    labels=dict(x="지표", y="섹터", color="값"),
-                    x=['배당수익률', '배당성향'],
-                    y=sector_dividend['섹터'],
-                    color_continuous_scale="YlOrRd",
-                    aspect="auto")
-
-    # 셀에 값 표시
-    fig.update_traces(text=sector_dividend[['배당수익률', '배당성향']].values.round(2), texttemplate="%{text}")
-    fig.update_layout(
-        title="섹터별 평균 배당률과 배당성향",
-        xaxis_title="",
-        yaxis_title="",
-        height=600,
-        width=800,
-    )
-
-    st.plotly_chart(fig, use_container_width=True)
+    # 섹터별 평균 배당률과 배당성향 히트맵 (두 화면이 같은 Figure를 공유)
+    st.plotly_chart(build_sector_dividend_heatmap(agg['sector_dividend']), use_container_width=True)
 
     st.markdown("""
     이 히트맵은 각 섹터의 평균 배당률과 배당성향을 보여줍니다:
@@ -676,7 +902,7 @@ with tabs[3]:  # 배당 분석
     with col1:
         # 배당수익률 vs 배당성향 산점도
         fig = px.scatter(
-            df,
+            df[['배당수익률', '배당성향', '시가총액(단위:백만원)', 'PBR', '종목명']],
             x='배당수익률',
             y='배당성향',
             size='시가총액(단위:백만원)',
@@ -687,18 +913,15 @@ with tabs[3]:  # 배당 분석
                 '배당수익률': '배당수익률 (%)',
                 '배당성향': '배당성향 (%)',
                 '시가총액(단위:백만원)': '시가총액'
-            }
+            },
+            render_mode='webgl'
         )
         fig.update_layout(get_chart_layout())
         st.plotly_chart(fig, use_container_width=True)
     
     with col2:
         # 연도별 배당수익률 변화
-        avg_dividend_by_year = {
-            '2023': df[year_columns['배당수익률'][0]].mean(),
-            '2022': df[year_columns['배당수익률'][1]].mean(),
-            '2021': df[year_columns['배당수익률'][2]].mean()
-        }
+        avg_dividend_by_year = agg['yearly_avg_by_metric']['배당수익률']
         
         fig = go.Figure()
         fig.add_trace(go.Scatter(
@@ -712,7 +935,7 @@ with tabs[3]:  # 배당 분석
     
     # 상위 10개 고배당 기업
     st.subheader("Top 10 고배당 기업")
-    top_dividend = df.nlargest(10, '배당수익률')
+    top_dividend = agg['top_dividend']
     
     fig = px.bar(
         top_dividend,
@@ -724,7 +947,7 @@ with tabs[3]:  # 배당 분석
     )
     fig.update_traces(texttemplate='%{text:.1f}%', textposition='outside')
     fig.update_layout(get_chart_layout())
-    st.plotly_chart(fig, use_container_width=True)
+    st.plotly_chart(fig, use_container_width=True, config=STATIC_CHART_CONFIG)
 
     # 배당 워드클라우드 추가
     st.subheader("전체 기업 배당 워드클라우드")
@@ -733,7 +956,7 @@ with tabs[3]:  # 배당 분석
     dividend_companies = df[df['배당수익률'] > 0]
 
     # 워드클라우드용 데이터 생성
-    word_freq = {row['종목명']: row['배당수익률'] for _, row in dividend_companies.iterrows()}
+    word_freq = dict(zip(dividend_companies['종목명'].to_numpy(), dividend_companies['배당수익률'].to_numpy()))
 
     # 서버에 설치된 한글 폰트 찾기
     #font_path = os.path.join(os.path.dirname(__file__), 'fonts', 'NanumGothic.ttf')
@@ -742,6 +965,7 @@ with tabs[3]:  # 배당 분석
     # fonts 폴더와 data 폴더 경로 설정
     #font_path = os.path.join(ROOT_DIR, 'fonts', 'NanumGothic.ttf')
     font_path='NanumGothic.ttf'
+    #import matplotlib.font_manager as fm
     #for font in fm.findSystemFonts():
     #    if 'gothic' in font.lower() or 'gulim' in font.lower():
     #        font_path = font
@@ -750,20 +974,9 @@ with tabs[3]:  # 배당 분석
     if font_path is None:
         st.error("적절한 한글 폰트를 찾을 수 없습니다. 서버에 한글 폰트를 설치해 주세요.")
     else:
-        # 워드클라우드 생성
-        wordcloud = WordCloud(
-            font_path=font_path,
-            width=800, 
-            height=400, 
-            background_color='white',
-            colormap='viridis'
-        ).generate_from_frequencies(word_freq)
-
-        # 워드클라우드 표시
-        fig, ax = plt.subplots(figsize=(10, 5))
-        ax.imshow(wordcloud, interpolation='bilinear')
-        ax.axis('off')
-        st.pyplot(fig)
+        # 워드클라우드 생성 및 표시
+        png_bytes = render_wordcloud_png(tuple(word_freq.items()), font_path)
+        st.image(png_bytes, use_column_width=True)
 
         st.markdown("""
         이 워드클라우드는 배당을 지급하는 모든 기업을 보여줍니다. 
@@ -771,7 +984,9 @@ with tabs[3]:  # 배당 분석
         이를 통해 전체 시장에서 어떤 기업들이 높은 배당을 제공하는지 한눈에 파악할 수 있습니다.
         """)
 
-with tabs[4]:  # 연도별 추이
+# 연도별 추이
+@st.fragment
+def render_yearly_trends(df, agg, year_columns):
     st.subheader("연도별 지표 추이 분석")
     
     # 지표 선택
@@ -781,69 +996,34 @@ with tabs[4]:  # 연도별 추이
     )
     
     # 전체 시장 추이
-    yearly_avg = {
-        '2023': df[year_columns[metric_choice][0]].mean(),
-        '2022': df[year_columns[metric_choice][1]].mean(),
-        '2021': df[year_columns[metric_choice][2]].mean()
-    }
+    yearly_avg = agg['yearly_avg_by_metric'][metric_choice]
     
     col1, col2 = st.columns(2)
     
     with col1:
         # 전체 시장 추이
-        fig = go.Figure()
-        fig.add_trace(go.Scatter(
-            x=list(yearly_avg.keys()),
-            y=list(yearly_avg.values()),
-            mode='lines+markers',
-            name=f'평균 {metric_choice}'
-        ))
-        fig.update_layout(**get_chart_layout(f"시장 평균 {metric_choice} 추이"))
-        st.plotly_chart(fig, use_container_width=True)
+        st.plotly_chart(build_market_trend_chart(yearly_avg, metric_choice), use_container_width=True)
     
     with col2:
         # 섹터별 연도별 추이
-        sector_yearly = df[df['섹터'].notna()].groupby('섹터')[year_columns[metric_choice]].mean()
-        
-        fig = go.Figure()
-        for year, col in zip(['2023', '2022', '2021'], year_columns[metric_choice]):
-            fig.add_trace(go.Bar(
-                name=year,
-                x=sector_yearly.index,
-                y=sector_yearly[col]
-            ))
-        fig.update_layout(
-            **get_chart_layout(f"섹터별 연도별 {metric_choice} 추이"),
-            barmode='group'
+        sector_yearly = agg['sector_yearly_by_metric'][metric_choice]
+        st.plotly_chart(
+            build_sector_yearly_chart(sector_yearly, year_columns[metric_choice], metric_choice),
+            use_container_width=True
         )
-        st.plotly_chart(fig, use_container_width=True)
     
     # 개선도 분석
     st.subheader("지표 개선도 분석")
-    df[f'{metric_choice}_개선도'] = df[year_columns[metric_choice][0]] - df[year_columns[metric_choice][1]]
-    
-    top_improved = df.nlargest(10, f'{metric_choice}_개선도')
-    fig = px.bar(
-        top_improved,
-        x='종목명',
-        y=f'{metric_choice}_개선도',
-        color='섹터',
-        title=f"Top 10 {metric_choice} 개선 기업"
-    )
-    fig.update_layout(get_chart_layout())
-    st.plotly_chart(fig, use_container_width=True)
+    top_improved = agg['top_improved_by_metric'][metric_choice]
+    st.plotly_chart(build_top_improved_chart(top_improved, metric_choice), use_container_width=True)
 
-with tabs[5]:  # 투자 기회
+# 투자 기회
+@st.fragment
+def render_investment_opportunities(df, agg, year_columns):
     st.subheader("투자 기회 분석")
     
-    # 가치투자 점수 계산
-    df['PBR_rank'] = df['PBR'].rank(ascending=True)
-    df['ROE_rank'] = df['ROE'].rank(ascending=False)
-    df['시가총액_rank'] = df['시가총액(단위:백만원)'].rank(ascending=False)
-    df['가치투자점수'] = (df['PBR_rank'] + df['ROE_rank'] + df['시가총액_rank']) / 3
-    
-    # 상위 가치투자 기회
-    top_value = df.nlargest(100, '가치투자점수')
+    # 상위 가치투자 기회 (가치투자 점수는 load_data, 상위 100개는 compute_aggregates에서 계산)
+    top_value = agg['top_value']
     
     # 두 개의 컬럼으로 나누기
     col1, col2 = st.columns([1, 1])
@@ -858,7 +1038,8 @@ with tabs[5]:  # 투자 기회
             size_max=50,
             color='섹터',
             hover_name='종목명',
-            title="가치투자 기회"
+            title="가치투자 기회",
+            render_mode='webgl'
         )
         
         # 레이아웃 업데이트
@@ -894,16 +1075,8 @@ with tabs[5]:  # 투자 기회
     with col2:
         # 투자 기회 목록
         st.dataframe(
-            top_value[['가치투자점수','종목명', 'PBR', 'ROE', '시가총액(단위:백만원)', '섹터','배당수익률','배당성향']]
-            .sort_values('가치투자점수', ascending=True)
-            .style.format({
-                'PBR': '{:.2f}',
-                'ROE': '{:.2f}%',
-                '시가총액(단위:백만원)': '{:,.0f}',
-                '가치투자점수': '{:.0f}',
-                '배당수익률': '{:.2f}%',
-                '배당성향': '{:.2f}%',
-            })
+            top_value.sort_values('가치투자점수', ascending=True),
+            column_config=VALUE_TABLE_COLUMN_CONFIG
         )
     st.markdown(f"""
 가치투자 점수의 의미:
@@ -926,6 +1099,18 @@ with tabs[5]:  # 투자 기회
 → 점수가 낮을수록 더 좋은 투자 대상
 """)
 
+# 화면 선택 (선택된 화면의 함수만 실행해 다른 화면의 계산을 건너뜀)
+VIEWS = {
+    "📊 시장 개요": render_market_overview,
+    "🏢 섹터 분석": render_sector_analysis,
+    "🔍 개별 종목 분석": render_stock_analysis,
+    "💰 배당 분석": render_dividend_analysis,
+    "📅 연도별 추이": render_yearly_trends,
+    "💡 투자 기회": render_investment_opportunities
+}
+view = st.radio("View", list(VIEWS), horizontal=True, key="view", label_visibility="collapsed")
+VIEWS[view](df, agg, year_columns)
+
 # 자 전략 결론
 st.markdown("---")
 st.markdown(f"""